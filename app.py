@@ -1,118 +1,378 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request
 from flask_cors import CORS
 import sqlite3
 import json
+import math
+import os
+import re
+import numpy as np
+import orjson
+import queue
+import threading
+import time
+import atexit
+import collections
+from contextlib import closing, contextmanager
+from functools import lru_cache
 from datetime import datetime
 
 app = Flask(__name__)
 CORS(app)
 
 DATABASE = 'real_estate.db'
+# Stored in PRAGMA user_version once init_db has run against a database
+SCHEMA_VERSION = 3
+# Sample properties and investor profiles inserted into an empty database
+SEED_DATA = os.path.join(app.root_path, 'seed_data.json')
+POOL_SIZE = 8
+STATEMENT_CACHE_SIZE = 256
+WRITE_BATCH_SIZE = 100
+WRITE_BATCH_WINDOW = 0.01  # seconds
+DEFERRED_FLUSH_INTERVAL = 1.0  # seconds
+DEFERRED_FLUSH_ROWS = 500
+
+# Applied to every pooled connection when it is opened
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA mmap_size=268435456',
+    'PRAGMA cache_size=-65536',
+    'PRAGMA busy_timeout=5000',
+)
+
+# Request-path SQL, kept as constants so each connection's statement
+# cache sees the identical string on every call
+SQL_SELECT_PROPERTIES = 'SELECT * FROM properties ORDER BY price, id'
+SQL_SELECT_PROPERTY = 'SELECT * FROM properties WHERE id = ?'
+SQL_SELECT_PROPERTIES_IN = 'SELECT * FROM properties WHERE id IN ({placeholders})'
+SQL_INSERT_PROPERTY = '''
+    INSERT INTO properties (name, location, price, size, annual_rental_income, 
+                           maintenance_cost, risk_level, property_type, year_built, description)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+# Parameter order of SQL_INSERT_PROPERTY and SQL_INSERT_PROFILE
+PROPERTY_FIELDS = ('name', 'location', 'price', 'size', 'annual_rental_income',
+                   'maintenance_cost', 'risk_level', 'property_type', 'year_built', 'description')
+PROFILE_FIELDS = ('name', 'budget_min', 'budget_max', 'risk_tolerance',
+                  'investment_horizon', 'preferred_locations', 'min_rental_yield', 'min_roi')
+# Fields that must be finite numbers / non-null strings before a row is queued for insert
+PROPERTY_NUMERIC_FIELDS = ('price', 'size', 'annual_rental_income', 'maintenance_cost')
+PROPERTY_TEXT_FIELDS = ('name', 'location', 'risk_level', 'property_type')
+PROFILE_NUMERIC_FIELDS = ('budget_min', 'budget_max', 'min_rental_yield', 'min_roi')
+PROFILE_TEXT_FIELDS = ('name', 'risk_tolerance', 'investment_horizon')
+# Range of a SQLite INTEGER; larger Python ints cannot be bound
+SQLITE_INT_MIN = -2 ** 63
+SQLITE_INT_MAX = 2 ** 63 - 1
+SQL_SELECT_PROPERTIES_VERSION = '''
+    SELECT printf('%x-%d', db.version, props.version)
+    FROM data_versions AS db, data_versions AS props
+    WHERE db.name = 'database' AND props.name = 'properties'
+'''
+SQL_SELECT_PROFILES = 'SELECT * FROM investor_profiles'
+SQL_SELECT_PROFILE = 'SELECT * FROM investor_profiles WHERE id = ?'
+SQL_INSERT_PROFILE = '''
+    INSERT INTO investor_profiles (name, budget_min, budget_max, risk_tolerance, 
+                                   investment_horizon, preferred_locations, min_rental_yield, min_roi)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+SQL_INSERT_RECOMMENDATION = '''
+    INSERT INTO recommendations (investor_profile_id, property_id, rental_yield,
+                                net_roi, score, reasoning)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
 
 # Database helper functions
-def get_db_connection():
-    conn = sqlite3.connect(DATABASE)
+def open_connection(database):
+    """Open a SQLite connection with the app-wide settings and pragmas"""
+    conn = sqlite3.connect(
+        database,
+        check_same_thread=False,
+        isolation_level=None,
+        cached_statements=STATEMENT_CACHE_SIZE
+    )
     conn.row_factory = sqlite3.Row
+    for pragma in SQLITE_PRAGMAS:
+        conn.execute(pragma)
     return conn
 
+class ConnectionPool:
+    """Bounded pool of long-lived SQLite connections shared by all requests"""
+
+    def __init__(self, database, size=POOL_SIZE):
+        self.database = database
+        self._connections = queue.Queue(maxsize=size)
+        for _ in range(size):
+            self._connections.put(open_connection(database))
+
+    def get(self):
+        return self._connections.get()
+
+    def put(self, conn):
+        self._connections.put(conn)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Return the process-wide connection pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(DATABASE)
+    return _pool
+
+class BackgroundWriter:
+    """
+    Single writer thread owning its own connection
+    Queued inserts are committed together, up to WRITE_BATCH_SIZE items or
+    WRITE_BATCH_WINDOW seconds per transaction, off the request thread.
+    Deferred rows are bookkeeping nobody waits on; they are buffered and
+    written every DEFERRED_FLUSH_INTERVAL seconds or DEFERRED_FLUSH_ROWS rows
+    """
+
+    _STOP = object()
+    _FLUSH = object()
+
+    def __init__(self, database):
+        self.database = database
+        self._queue = queue.Queue()
+        self._deferred = collections.deque()
+        self._thread = threading.Thread(target=self._run, name='db-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, sql, rows):
+        """Queue rows for executemany(sql, rows)"""
+        self._queue.put((sql, rows))
+
+    def defer(self, sql, rows):
+        """Buffer rows for executemany(sql, rows) at the next periodic flush"""
+        self._deferred.extend((sql, row) for row in rows)
+        if len(self._deferred) >= DEFERRED_FLUSH_ROWS:
+            self._queue.put(self._FLUSH)
+
+    def flush(self):
+        """Block until everything queued or deferred so far has been written"""
+        self._queue.put(self._FLUSH)
+        self._queue.join()
+
+    def close(self):
+        """Write out pending and deferred items and stop the thread"""
+        self._queue.put(self._STOP)
+        self._thread.join()
+
+    def _run(self):
+        conn = open_connection(self.database)
+        next_flush = time.monotonic() + DEFERRED_FLUSH_INTERVAL
+        while True:
+            batch = []
+            try:
+                batch.append(self._queue.get(timeout=max(0, next_flush - time.monotonic())))
+            except queue.Empty:
+                pass
+            
+            deadline = time.monotonic() + WRITE_BATCH_WINDOW
+            while batch and batch[-1] is not self._STOP and len(batch) < WRITE_BATCH_SIZE:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            
+            stop = self._STOP in batch
+            items = [item for item in batch if item is not self._STOP and item is not self._FLUSH]
+            if stop or self._FLUSH in batch or time.monotonic() >= next_flush:
+                items.extend(self._drain_deferred())
+                next_flush = time.monotonic() + DEFERRED_FLUSH_INTERVAL
+            if items:
+                self._write(conn, items)
+            for _ in batch:
+                self._queue.task_done()
+            if stop:
+                conn.close()
+                return
+
+    def _drain_deferred(self):
+        # One item per row: still a single transaction, but a failed batch
+        # is retried row by row so one bad row can't drop its neighbours
+        items = []
+        while self._deferred:
+            sql, row = self._deferred.popleft()
+            items.append((sql, [row]))
+        return items
+
+    def _write(self, conn, items):
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for sql, rows in items:
+                conn.executemany(sql, rows)
+            conn.commit()
+        except Exception:
+            # Release the write lock whatever failed, or every other
+            # connection would see "database is locked"
+            if conn.in_transaction:
+                conn.rollback()
+            # Retry one by one so a single bad item doesn't drop the batch
+            if len(items) > 1:
+                for item in items:
+                    self._write(conn, [item])
+            else:
+                app.logger.exception('Background write failed')
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def get_writer():
+    """Return the process-wide background writer, starting it on first use"""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = BackgroundWriter(DATABASE)
+                atexit.register(_writer.close)
+    return _writer
+
+@contextmanager
+def db():
+    """Borrow a pooled connection for the duration of a request"""
+    pool = get_pool()
+    conn = pool.get()
+    try:
+        yield conn
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        pool.put(conn)
+
+def _reset_after_fork():
+    # SQLite connections and threads must not cross a fork; a worker forked
+    # from a preloaded master opens its own pool and writer on first use
+    global _pool, _writer
+    _pool = None
+    _writer = None
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+def properties_version():
+    """
+    Change counter of the properties table, maintained by triggers, prefixed
+    with a random per-database nonce so a recreated database never repeats
+    an earlier version
+    Shared by every process using the database; part of every cache key
+    and ETag so cached results are never served across a change
+    """
+    with db() as conn:
+        return conn.execute(SQL_SELECT_PROPERTIES_VERSION).fetchone()[0]
+
+def load_seed_data():
+    """Read SEED_DATA into insert-ready property and profile tuples"""
+    with open(SEED_DATA, 'rb') as f:
+        seed = orjson.loads(f.read())
+    properties = [tuple(prop.get(field) for field in PROPERTY_FIELDS) for prop in seed['properties']]
+    profiles = [tuple(profile.get(field) for field in PROFILE_FIELDS) for profile in seed['investor_profiles']]
+    return properties, profiles
+
 def init_db():
     """Initialize the database with tables and sample data"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Create properties table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS properties (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            location TEXT NOT NULL,
-            price REAL NOT NULL,
-            size REAL NOT NULL,
-            annual_rental_income REAL NOT NULL,
-            maintenance_cost REAL NOT NULL,
-            risk_level TEXT NOT NULL,
-            property_type TEXT NOT NULL,
-            year_built INTEGER,
-            description TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Create investor profiles table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS investor_profiles (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            budget_min REAL NOT NULL,
-            budget_max REAL NOT NULL,
-            risk_tolerance TEXT NOT NULL,
-            investment_horizon TEXT NOT NULL,
-            preferred_locations TEXT,
-            min_rental_yield REAL,
-            min_roi REAL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Create recommendations history table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS recommendations (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            investor_profile_id INTEGER,
-            property_id INTEGER,
-            rental_yield REAL,
-            net_roi REAL,
-            score REAL,
-            reasoning TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (investor_profile_id) REFERENCES investor_profiles (id),
-            FOREIGN KEY (property_id) REFERENCES properties (id)
-        )
-    ''')
-    
-    # Check if sample data already exists
-    cursor.execute('SELECT COUNT(*) FROM properties')
-    if cursor.fetchone()[0] == 0:
-        # Insert sample properties
-        sample_properties = [
-            ('Downtown Luxury Apartment', 'Downtown City Center', 450000, 1200, 36000, 4500, 'Low', 'Apartment', 2020, 'Modern luxury apartment in prime location with high demand'),
-            ('Suburban Family Home', 'Green Valley Suburbs', 320000, 2000, 28800, 6400, 'Low', 'House', 2015, 'Spacious family home in growing suburban area'),
-            ('Beachfront Condo', 'Coastal Beach Area', 580000, 1500, 52200, 8700, 'Medium', 'Condo', 2018, 'Premium beachfront property with vacation rental potential'),
-            ('Urban Studio', 'University District', 180000, 600, 18000, 2700, 'Medium', 'Studio', 2019, 'Compact studio near university, high student demand'),
-            ('Commercial Office Space', 'Business District', 750000, 3000, 75000, 15000, 'Medium', 'Commercial', 2017, 'Prime office space with corporate tenants'),
-            ('Fixer-Upper Duplex', 'Emerging Neighborhood', 220000, 1800, 21600, 8800, 'High', 'Duplex', 1995, 'Value-add opportunity in gentrifying area'),
-            ('Luxury Villa', 'Hillside Estates', 1200000, 4500, 84000, 18000, 'Low', 'Villa', 2021, 'Premium villa with panoramic views'),
-            ('Budget Apartment', 'Industrial Zone', 120000, 500, 12000, 3600, 'High', 'Apartment', 2005, 'Affordable entry-level investment property'),
-            ('Mid-Rise Condo', 'Metro Center', 380000, 1100, 38000, 5700, 'Low', 'Condo', 2019, 'Well-maintained condo with metro access'),
-            ('Townhouse', 'Family District', 425000, 2200, 40800, 6800, 'Low', 'Townhouse', 2016, 'Modern townhouse in family-friendly neighborhood')
-        ]
+    # A dedicated connection, so a preloading master never opens the pool
+    with closing(open_connection(DATABASE)) as conn:
+        # Warm starts skip the DDL and seed checks entirely
+        if conn.execute('PRAGMA user_version').fetchone()[0] >= SCHEMA_VERSION:
+            return
         
-        cursor.executemany('''
-            INSERT INTO properties (name, location, price, size, annual_rental_income, 
-                                   maintenance_cost, risk_level, property_type, year_built, description)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', sample_properties)
-    
-    # Check if investor profiles already exist
-    cursor.execute('SELECT COUNT(*) FROM investor_profiles')
-    if cursor.fetchone()[0] == 0:
-        # Insert predefined investor profiles
-        sample_profiles = [
-            ('Conservative End-User', 200000, 500000, 'Low', 'Long-term (10+ years)', 'Suburbs, Family District', 5.0, 3.0),
-            ('Balanced Rental Investor', 150000, 600000, 'Medium', 'Medium-term (5-10 years)', 'Downtown, Metro Center', 7.0, 5.0),
-            ('Aggressive Growth Investor', 100000, 400000, 'High', 'Short-term (1-5 years)', 'Emerging, University', 10.0, 8.0),
-            ('Premium Long-term Holder', 500000, 1500000, 'Low', 'Long-term (10+ years)', 'Hillside, Coastal', 6.0, 4.0),
-            ('Value-Add Specialist', 150000, 350000, 'High', 'Medium-term (5-10 years)', 'Emerging, Industrial', 12.0, 10.0)
-        ]
-        
-        cursor.executemany('''
-            INSERT INTO investor_profiles (name, budget_min, budget_max, risk_tolerance, 
-                                          investment_horizon, preferred_locations, min_rental_yield, min_roi)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', sample_profiles)
+        cursor = conn.cursor()
+        cursor.execute('BEGIN')
+    
+        # Create properties table
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS properties (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                location TEXT NOT NULL,
+                price REAL NOT NULL,
+                size REAL NOT NULL,
+                annual_rental_income REAL NOT NULL,
+                maintenance_cost REAL NOT NULL,
+                risk_level TEXT NOT NULL,
+                property_type TEXT NOT NULL,
+                year_built INTEGER,
+                description TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        # Index for the price-ordered snapshot query
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_props_price ON properties (price)')
+
+        # Create investor profiles table
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS investor_profiles (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                budget_min REAL NOT NULL,
+                budget_max REAL NOT NULL,
+                risk_tolerance TEXT NOT NULL,
+                investment_horizon TEXT NOT NULL,
+                preferred_locations TEXT,
+                min_rental_yield REAL,
+                min_roi REAL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+    
+        # Create recommendations history table
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS recommendations (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                investor_profile_id INTEGER,
+                property_id INTEGER,
+                rental_yield REAL,
+                net_roi REAL,
+                score REAL,
+                reasoning TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (investor_profile_id) REFERENCES investor_profiles (id),
+                FOREIGN KEY (property_id) REFERENCES properties (id)
+            )
+        ''')
     
-    conn.commit()
-    conn.close()
+        # Properties change counter and database nonce behind properties_version()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS data_versions (
+                name TEXT PRIMARY KEY,
+                version INTEGER NOT NULL
+            )
+        ''')
+        cursor.execute("INSERT OR IGNORE INTO data_versions (name, version) VALUES ('properties', 0)")
+        # Set once when the database is created; see properties_version()
+        cursor.execute("INSERT OR IGNORE INTO data_versions (name, version) VALUES ('database', random())")
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS properties_version_{event.lower()}
+                AFTER {event} ON properties
+                BEGIN
+                    UPDATE data_versions SET version = version + 1 WHERE name = 'properties';
+                END
+            ''')
+    
+        # Seed whichever tables are still empty
+        cursor.execute('SELECT EXISTS (SELECT 1 FROM properties)')
+        has_properties = cursor.fetchone()[0]
+        cursor.execute('SELECT EXISTS (SELECT 1 FROM investor_profiles)')
+        has_profiles = cursor.fetchone()[0]
+        
+        if not (has_properties and has_profiles):
+            sample_properties, sample_profiles = load_seed_data()
+            if not has_properties:
+                cursor.executemany(SQL_INSERT_PROPERTY, sample_properties)
+            if not has_profiles:
+                cursor.executemany(SQL_INSERT_PROFILE, sample_profiles)
+    
+        cursor.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        conn.commit()
 
 # Investment calculation functions
 def calculate_rental_yield(annual_rental_income, property_price):
@@ -124,7 +384,36 @@ def calculate_net_roi(annual_rental_income, maintenance_cost, property_price):
     net_income = annual_rental_income - maintenance_cost
     return (net_income / property_price) * 100
 
-def calculate_investment_score(property, profile):
+RISK_INDEX = {'Low': 0, 'Medium': 1, 'High': 2}
+# Code for a stored risk_level outside RISK_INDEX; it earns no risk points
+UNKNOWN_RISK = len(RISK_INDEX)
+
+# Risk alignment points indexed by [risk_tolerance][risk_level]
+RISK_MATCH = (
+    (20, 10, 5, 0),
+    (15, 20, 15, 0),
+    (10, 15, 20, 0)
+)
+
+def column(rows, name):
+    """Extract a numeric column from fetched rows as a float64 array"""
+    return np.fromiter((row[name] for row in rows), dtype=np.float64, count=len(rows))
+
+LOCATION_SEPARATORS = re.compile(r'[\s,/-]+')
+
+def location_tokens(text):
+    """Lower-cased words of a location name"""
+    return frozenset(token for token in LOCATION_SEPARATORS.split(text.lower()) if token)
+
+def preferred_location_tokens(profile):
+    """
+    (phrase, words) for each of a profile's preferred locations, parsed once per request
+    A property matches a preference when its location contains the phrase
+    """
+    prefs = (loc.strip().lower() for loc in (profile.get('preferred_locations') or '').split(','))
+    return tuple((pref, location_tokens(pref)) for pref in prefs if pref)
+
+def calculate_investment_score(property, profile, location_matches):
     """
     Calculate investment score based on multiple factors
     Score range: 0-100
@@ -146,12 +435,8 @@ def calculate_investment_score(property, profile):
     score += price_fit
     
     # Risk alignment (20 points)
-    risk_match = {
-        'Low': {'Low': 20, 'Medium': 10, 'High': 5},
-        'Medium': {'Low': 15, 'Medium': 20, 'High': 15},
-        'High': {'Low': 10, 'Medium': 15, 'High': 20}
-    }
-    risk_score = risk_match[profile['risk_tolerance']][property['risk_level']]
+    risk_code = RISK_INDEX.get(property['risk_level'], UNKNOWN_RISK)
+    risk_score = RISK_MATCH[RISK_INDEX[profile['risk_tolerance']]][risk_code]
     score += risk_score
     
     if risk_score == 20:
@@ -185,17 +470,196 @@ def calculate_investment_score(property, profile):
     
     # Location preference bonus (up to 10 points)
     location_bonus = 0
-    if profile['preferred_locations']:
-        preferred_locs = [loc.strip().lower() for loc in profile['preferred_locations'].split(',')]
-        property_loc = property['location'].lower()
-        if any(pref in property_loc for pref in preferred_locs):
-            location_bonus = 10
-            reasoning_parts.append(f"✓ Location matches preferences")
+    if location_matches:
+        location_bonus = 10
+        reasoning_parts.append(f"✓ Location matches preferences")
     
     score += location_bonus
     
     return min(100, score), reasoning_parts
 
+RISK_MATCH_TABLE = np.array(RISK_MATCH, dtype=np.float64)
+
+def encode_risk_levels(levels):
+    """Map risk level names to int8 codes into RISK_MATCH_TABLE"""
+    return np.fromiter((RISK_INDEX.get(level, UNKNOWN_RISK) for level in levels),
+                       dtype=np.int8, count=len(levels))
+
+def score_properties(price, rental_yield, net_roi, risk_codes, location_match, profile):
+    """
+    Vectorized calculate_investment_score over arrays of properties
+    Returns the score for every property; reasoning is left to the caller
+    """
+    budget_min, budget_max = profile['budget_min'], profile['budget_max']
+    
+    # Price fit (25 points)
+    price_fit = np.where(
+        price > budget_max,
+        np.maximum(0, 25 - (price / budget_max - 1) * 50),
+        np.where(price < budget_min, np.maximum(0, 25 - (budget_min / price - 1) * 50), 25)
+    )
+    
+    # Risk alignment (20 points)
+    risk_score = RISK_MATCH_TABLE[RISK_INDEX[profile['risk_tolerance']], risk_codes]
+    
+    # Rental yield performance (30 points)
+    yield_diff = rental_yield - profile['min_rental_yield']
+    yield_score = np.where(yield_diff >= 0, np.minimum(30, 20 + yield_diff * 2), np.maximum(0, 20 + yield_diff * 3))
+    
+    # Net ROI performance (25 points)
+    roi_diff = net_roi - profile['min_roi']
+    roi_score = np.where(roi_diff >= 0, np.minimum(25, 15 + roi_diff * 2), np.maximum(0, 15 + roi_diff * 3))
+    
+    # Location preference bonus (up to 10 points)
+    location_bonus = np.where(location_match, 10, 0)
+    
+    return np.minimum(100, price_fit + risk_score + yield_score + roi_score + location_bonus)
+
+class PropertyStore:
+    """
+    Column-oriented snapshot of the properties table, ordered by price
+    Numeric columns are contiguous float64 arrays so scoring and analytics
+    scan them directly; records holds the row dicts served by the API
+    """
+
+    def __init__(self, rows):
+        self.ids = np.fromiter((row['id'] for row in rows), dtype=np.int64, count=len(rows))
+        self.price = column(rows, 'price')
+        self.size = column(rows, 'size')
+        self.income = column(rows, 'annual_rental_income')
+        self.maintenance = column(rows, 'maintenance_cost')
+        self.risk_level = [row['risk_level'] for row in rows]
+        self.risk = encode_risk_levels(self.risk_level)
+        self.property_type = [row['property_type'] for row in rows]
+        self.location = [row['location'] for row in rows]
+        self.location_lower = [loc.lower() for loc in self.location]
+        
+        # Inverted index: location word -> positions of properties containing it
+        self.location_index = {}
+        for i, loc in enumerate(self.location):
+            for token in location_tokens(loc):
+                self.location_index.setdefault(token, []).append(i)
+        self.rental_yield = calculate_rental_yield(self.income, self.price)
+        self.net_roi = calculate_net_roi(self.income, self.maintenance, self.price)
+        
+        self.records = []
+        for row, rental_yield, net_roi in zip(rows, self.rental_yield.tolist(), self.net_roi.tolist()):
+            record = dict(row)
+            record['rental_yield'] = rental_yield
+            record['net_roi'] = net_roi
+            self.records.append(record)
+
+    def __len__(self):
+        return len(self.records)
+
+    def rows_containing(self, word):
+        """Positions of properties with a location word containing word"""
+        rows = set()
+        for token, positions in self.location_index.items():
+            if word in token:
+                rows.update(positions)
+        return rows
+
+    def match_locations(self, pref_tokens):
+        """Boolean mask of properties whose location contains any preferred location"""
+        mask = np.zeros(len(self), dtype=np.bool_)
+        for phrase, words in pref_tokens:
+            # Each word of a contained phrase lies inside one location word,
+            # so the index narrows the candidates for the substring check
+            candidates = range(len(self))
+            for word in words:
+                candidates = self.rows_containing(word).intersection(candidates)
+            for i in candidates:
+                if phrase in self.location_lower[i]:
+                    mask[i] = True
+        return mask
+
+def group_prices(keys, price, key_name):
+    """
+    Count and average price per distinct key, sorted by key like SQL GROUP BY
+    Keys are mapped to integer codes once so counts and sums are single passes
+    """
+    labels, codes, counts = np.unique(np.asarray(keys, dtype=str), return_inverse=True, return_counts=True)
+    sums = np.bincount(codes, weights=price, minlength=len(labels))
+    return [
+        {key_name: label, 'count': count, 'avg_price': total / count}
+        for label, count, total in zip(labels.tolist(), counts.tolist(), sums.tolist())
+    ]
+
+@lru_cache(maxsize=1)
+def property_store(version):
+    """Snapshot of the properties table for the given properties version"""
+    with db() as conn:
+        rows = conn.execute(SQL_SELECT_PROPERTIES).fetchall()
+    return PropertyStore(rows)
+
+def is_number(value):
+    """True for finite ints and floats (bools excluded)"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return False
+    return math.isfinite(value)
+
+def is_bindable(value):
+    """True if sqlite3 can bind value as a query parameter"""
+    if isinstance(value, int):
+        return SQLITE_INT_MIN <= value <= SQLITE_INT_MAX
+    return value is None or isinstance(value, (float, str))
+
+def parse_id(value):
+    """Row id from an int, integral float or integer string; None if it isn't one"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, float):
+        # Reject fractions rather than truncating 1.9 to property 1
+        if not value.is_integer():
+            return None
+        value = int(value)
+    elif isinstance(value, str):
+        try:
+            value = int(value)
+        except ValueError:
+            return None
+    if isinstance(value, int) and is_bindable(value):
+        return value
+    return None
+
+def valid_row(data, params, numeric_fields, text_fields):
+    """Check an insert row before it is handed to the background writer"""
+    return (all(is_number(data[field]) for field in numeric_fields)
+            and all(isinstance(data[field], str) for field in text_fields)
+            and all(is_bindable(value) for value in params))
+
+def json_response(obj, status=200):
+    """Serialize obj with orjson; NumPy arrays and scalars are encoded directly"""
+    try:
+        body = orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    except orjson.JSONEncodeError:
+        # orjson rejects ints wider than 64 bits (e.g. echoed custom_profile
+        # values); the stdlib encoder handles them
+        body = json.dumps(obj, default=lambda value: value.tolist())
+    return app.response_class(
+        body,
+        status=status,
+        mimetype='application/json'
+    )
+
+def versioned_json_response(build):
+    """
+    JSON response for data derived only from the properties table
+    Tagged with the properties version; a matching If-None-Match gets an
+    empty 304 without calling build(version)
+    """
+    version = properties_version()
+    etag = str(version)
+    if request.if_none_match.contains_weak(etag):
+        response = app.response_class(status=304)
+    else:
+        response = json_response(build(version))
+    response.set_etag(etag, weak=True)
+    # Browsers may keep the body but must revalidate before reusing it
+    response.cache_control.no_cache = True
+    return response
+
 # API Routes
 @app.route('/')
 def index():
@@ -204,41 +668,22 @@ def index():
 @app.route('/api/properties', methods=['GET'])
 def get_properties():
     """Get all properties with calculated metrics"""
-    conn = get_db_connection()
-    properties = conn.execute('SELECT * FROM properties ORDER BY price').fetchall()
-    conn.close()
-    
-    result = []
-    for prop in properties:
-        prop_dict = dict(prop)
-        prop_dict['rental_yield'] = calculate_rental_yield(
-            prop['annual_rental_income'], 
-            prop['price']
-        )
-        prop_dict['net_roi'] = calculate_net_roi(
-            prop['annual_rental_income'],
-            prop['maintenance_cost'],
-            prop['price']
-        )
-        result.append(prop_dict)
-    
-    return jsonify(result)
+    return versioned_json_response(lambda version: property_store(version).records)
 
 @app.route('/api/properties/<int:property_id>', methods=['GET'])
 def get_property(property_id):
     """Get single property details"""
-    conn = get_db_connection()
-    prop = conn.execute('SELECT * FROM properties WHERE id = ?', (property_id,)).fetchone()
-    conn.close()
+    with db() as conn:
+        prop = conn.execute(SQL_SELECT_PROPERTY, (property_id,)).fetchone()
     
     if prop is None:
-        return jsonify({'error': 'Property not found'}), 404
+        return json_response({'error': 'Property not found'}, 404)
     
     prop_dict = dict(prop)
     prop_dict['rental_yield'] = calculate_rental_yield(prop['annual_rental_income'], prop['price'])
     prop_dict['net_roi'] = calculate_net_roi(prop['annual_rental_income'], prop['maintenance_cost'], prop['price'])
     
-    return jsonify(prop_dict)
+    return json_response(prop_dict)
 
 @app.route('/api/properties', methods=['POST'])
 def add_property():
@@ -249,46 +694,43 @@ def add_property():
                        'maintenance_cost', 'risk_level', 'property_type']
     
     if not all(field in data for field in required_fields):
-        return jsonify({'error': 'Missing required fields'}), 400
-    
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        INSERT INTO properties (name, location, price, size, annual_rental_income, 
-                               maintenance_cost, risk_level, property_type, year_built, description)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (
+        return json_response({'error': 'Missing required fields'}, 400)
+    
+    params = (
         data['name'], data['location'], data['price'], data['size'],
         data['annual_rental_income'], data['maintenance_cost'], data['risk_level'],
         data['property_type'], data.get('year_built'), data.get('description')
-    ))
-    
-    property_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
-    
-    return jsonify({'id': property_id, 'message': 'Property added successfully'}), 201
+    )
+    # The insert happens later on the writer thread, so reject anything it
+    # could not store while the client can still be told
+    if not valid_row(data, params, PROPERTY_NUMERIC_FIELDS, PROPERTY_TEXT_FIELDS):
+        return json_response({'error': 'Invalid field values'}, 400)
+    if data['risk_level'] not in RISK_INDEX:
+        return json_response({'error': 'risk_level must be one of Low, Medium, High'}, 400)
+    
+    # Committed by the background writer; cached reads refresh once it lands
+    get_writer().submit(SQL_INSERT_PROPERTY, [params])
+    
+    return json_response({'message': 'Property accepted'}, 202)
 
 @app.route('/api/investor-profiles', methods=['GET'])
 def get_profiles():
     """Get all investor profiles"""
-    conn = get_db_connection()
-    profiles = conn.execute('SELECT * FROM investor_profiles').fetchall()
-    conn.close()
+    with db() as conn:
+        profiles = conn.execute(SQL_SELECT_PROFILES).fetchall()
     
-    return jsonify([dict(profile) for profile in profiles])
+    return json_response([dict(profile) for profile in profiles])
 
 @app.route('/api/investor-profiles/<int:profile_id>', methods=['GET'])
 def get_profile(profile_id):
     """Get single investor profile"""
-    conn = get_db_connection()
-    profile = conn.execute('SELECT * FROM investor_profiles WHERE id = ?', (profile_id,)).fetchone()
-    conn.close()
+    with db() as conn:
+        profile = conn.execute(SQL_SELECT_PROFILE, (profile_id,)).fetchone()
     
     if profile is None:
-        return jsonify({'error': 'Profile not found'}), 404
+        return json_response({'error': 'Profile not found'}, 404)
     
-    return jsonify(dict(profile))
+    return json_response(dict(profile))
 
 @app.route('/api/investor-profiles', methods=['POST'])
 def add_profile():
@@ -299,25 +741,53 @@ def add_profile():
                        'investment_horizon', 'min_rental_yield', 'min_roi']
     
     if not all(field in data for field in required_fields):
-        return jsonify({'error': 'Missing required fields'}), 400
-    
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        INSERT INTO investor_profiles (name, budget_min, budget_max, risk_tolerance, 
-                                       investment_horizon, preferred_locations, min_rental_yield, min_roi)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (
+        return json_response({'error': 'Missing required fields'}, 400)
+    
+    params = (
         data['name'], data['budget_min'], data['budget_max'], data['risk_tolerance'],
         data['investment_horizon'], data.get('preferred_locations', ''),
         data['min_rental_yield'], data['min_roi']
-    ))
+    )
+    if not valid_row(data, params, PROFILE_NUMERIC_FIELDS, PROFILE_TEXT_FIELDS):
+        return json_response({'error': 'Invalid field values'}, 400)
+    if data['risk_tolerance'] not in RISK_INDEX:
+        return json_response({'error': 'risk_tolerance must be one of Low, Medium, High'}, 400)
+    
+    get_writer().submit(SQL_INSERT_PROFILE, [params])
     
-    profile_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
+    return json_response({'message': 'Profile accepted'}, 202)
+
+@lru_cache(maxsize=256)
+def rank_properties(profile_key, top_n, version):
+    """
+    Score every property against a JSON-encoded profile and return the
+    top_n recommendations with the number of properties analyzed
+    version only partitions the cache; see properties_version()
+    """
+    profile = json.loads(profile_key)
+    store = property_store(version)
+    
+    # Score every property in one array pass, then keep the best top_n
+    location_match = store.match_locations(preferred_location_tokens(profile))
+    scores = score_properties(store.price, store.rental_yield, store.net_roi, store.risk, location_match, profile)
+    # Highest score first, ties broken by id
+    top = np.lexsort((store.ids, -scores))[:top_n]
+    
+    # Reasoning is only needed for the properties we return
+    recommendations = []
+    for i in top.tolist():
+        prop_dict = store.records[i]
+        _, reasoning_parts = calculate_investment_score(prop_dict, profile, location_match[i])
+
+        recommendations.append({
+            'property': prop_dict,
+            'score': float(scores[i]),
+            'reasoning': reasoning_parts,
+            'rental_yield': prop_dict['rental_yield'],
+            'net_roi': prop_dict['net_roi']
+        })
     
-    return jsonify({'id': profile_id, 'message': 'Profile added successfully'}), 201
+    return recommendations, len(store)
 
 @app.route('/api/recommendations', methods=['POST'])
 def get_recommendations():
@@ -327,74 +797,40 @@ def get_recommendations():
     custom_profile = data.get('custom_profile')
     top_n = data.get('top_n', 5)
     
-    conn = get_db_connection()
-    
     # Get investor profile
     if profile_id:
-        profile = conn.execute('SELECT * FROM investor_profiles WHERE id = ?', (profile_id,)).fetchone()
+        with db() as conn:
+            profile = conn.execute(SQL_SELECT_PROFILE, (profile_id,)).fetchone()
         if not profile:
-            conn.close()
-            return jsonify({'error': 'Profile not found'}), 404
+            return json_response({'error': 'Profile not found'}, 404)
         profile = dict(profile)
     elif custom_profile:
         profile = custom_profile
     else:
-        conn.close()
-        return jsonify({'error': 'Profile ID or custom profile required'}), 400
-    
-    # Get all properties
-    properties = conn.execute('SELECT * FROM properties').fetchall()
-    
-    # Calculate scores for each property
-    recommendations = []
-    for prop in properties:
-        prop_dict = dict(prop)
-        prop_dict['rental_yield'] = calculate_rental_yield(
-            prop['annual_rental_income'], 
-            prop['price']
-        )
-        prop_dict['net_roi'] = calculate_net_roi(
-            prop['annual_rental_income'],
-            prop['maintenance_cost'],
-            prop['price']
-        )
-        
-        score, reasoning_parts = calculate_investment_score(prop_dict, profile)
-        
-        recommendations.append({
-            'property': prop_dict,
-            'score': score,
-            'reasoning': reasoning_parts,
-            'rental_yield': prop_dict['rental_yield'],
-            'net_roi': prop_dict['net_roi']
-        })
-    
-    # Sort by score
-    recommendations.sort(key=lambda x: x['score'], reverse=True)
-    
-    # Store top recommendations in history
-    cursor = conn.cursor()
-    for rec in recommendations[:top_n]:
-        cursor.execute('''
-            INSERT INTO recommendations (investor_profile_id, property_id, rental_yield, 
-                                        net_roi, score, reasoning)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (
-            profile.get('id'),
-            rec['property']['id'],
-            rec['rental_yield'],
-            rec['net_roi'],
-            rec['score'],
-            '\n'.join(rec['reasoning'])
-        ))
-    
-    conn.commit()
-    conn.close()
-    
-    return jsonify({
+        return json_response({'error': 'Profile ID or custom profile required'}, 400)
+    
+    # Cached per (profile, top_n) until the properties table changes
+    profile_key = json.dumps(profile, sort_keys=True)
+    recommendations, total_analyzed = rank_properties(profile_key, top_n, properties_version())
+    
+    # Store top recommendations in history; buffered and written off the request path.
+    # Only a stored profile's id is recorded; custom profiles are client data
+    history_profile_id = profile['id'] if profile_id else None
+    rows = [(
+        history_profile_id,
+        rec['property']['id'],
+        rec['rental_yield'],
+        rec['net_roi'],
+        rec['score'],
+        '\n'.join(rec['reasoning'])
+    ) for rec in recommendations]
+    
+    get_writer().defer(SQL_INSERT_RECOMMENDATION, rows)
+    
+    return json_response({
         'profile': profile,
-        'recommendations': recommendations[:top_n],
-        'total_analyzed': len(recommendations)
+        'recommendations': recommendations,
+        'total_analyzed': total_analyzed
     })
 
 @app.route('/api/compare', methods=['POST'])
@@ -404,79 +840,84 @@ def compare_properties():
     property_ids = data.get('property_ids', [])
     
     if not property_ids:
-        return jsonify({'error': 'Property IDs required'}), 400
+        return json_response({'error': 'Property IDs required'}, 400)
+    
+    # Ids may arrive as strings ("1"); normalize so they match the integer row ids
+    property_ids = [parse_id(prop_id) for prop_id in property_ids]
+    if None in property_ids:
+        return json_response({'error': 'Property IDs must be integers'}, 400)
+    
+    # Fetch every requested property in one query, then restore request order
+    unique_ids = list(dict.fromkeys(property_ids))
+    sql = SQL_SELECT_PROPERTIES_IN.format(placeholders=', '.join('?' * len(unique_ids)))
+    with db() as conn:
+        by_id = {row['id']: row for row in conn.execute(sql, unique_ids)}
+    rows = [by_id[prop_id] for prop_id in property_ids if prop_id in by_id]
+    
+    price = column(rows, 'price')
+    size = column(rows, 'size')
+    income = column(rows, 'annual_rental_income')
+    maintenance = column(rows, 'maintenance_cost')
+    metrics = zip(
+        calculate_rental_yield(income, price).tolist(),
+        calculate_net_roi(income, maintenance, price).tolist(),
+        (price / size).tolist(),
+        (maintenance / income * 100).tolist()
+    )
     
-    conn = get_db_connection()
     properties = []
+    for prop, (rental_yield, net_roi, price_per_sqft, maintenance_ratio) in zip(rows, metrics):
+        prop_dict = dict(prop)
+        prop_dict['rental_yield'] = rental_yield
+        prop_dict['net_roi'] = net_roi
+        prop_dict['price_per_sqft'] = price_per_sqft
+        prop_dict['maintenance_ratio'] = maintenance_ratio
+        properties.append(prop_dict)
     
-    for prop_id in property_ids:
-        prop = conn.execute('SELECT * FROM properties WHERE id = ?', (prop_id,)).fetchone()
-        if prop:
-            prop_dict = dict(prop)
-            prop_dict['rental_yield'] = calculate_rental_yield(
-                prop['annual_rental_income'], 
-                prop['price']
-            )
-            prop_dict['net_roi'] = calculate_net_roi(
-                prop['annual_rental_income'],
-                prop['maintenance_cost'],
-                prop['price']
-            )
-            prop_dict['price_per_sqft'] = prop['price'] / prop['size']
-            prop_dict['maintenance_ratio'] = (prop['maintenance_cost'] / prop['annual_rental_income']) * 100
-            properties.append(prop_dict)
-    
-    conn.close()
+    return json_response({'properties': properties})
+
+@lru_cache(maxsize=1)
+def compute_analytics(version):
+    """Market statistics for the given properties version"""
+    store = property_store(version)
     
-    return jsonify({'properties': properties})
+    # Overall statistics
+    if len(store):
+        overall = {
+            'total_properties': len(store),
+            'avg_price': store.price.mean(),
+            'min_price': store.price.min(),
+            'max_price': store.price.max(),
+            'avg_rental_income': store.income.mean(),
+            'avg_size': store.size.mean()
+        }
+    else:
+        overall = {
+            'total_properties': 0,
+            'avg_price': None,
+            'min_price': None,
+            'max_price': None,
+            'avg_rental_income': None,
+            'avg_size': None
+        }
+    
+    return {
+        'overall': overall,
+        'by_risk': group_prices(store.risk_level, store.price, 'risk_level'),
+        'by_type': group_prices(store.property_type, store.price, 'property_type'),
+        'by_location': group_prices(store.location, store.price, 'location')
+    }
 
 @app.route('/api/analytics', methods=['GET'])
 def get_analytics():
     """Get market analytics and statistics"""
-    conn = get_db_connection()
-    
-    # Overall statistics
-    stats = conn.execute('''
-        SELECT 
-            COUNT(*) as total_properties,
-            AVG(price) as avg_price,
-            MIN(price) as min_price,
-            MAX(price) as max_price,
-            AVG(annual_rental_income) as avg_rental_income,
-            AVG(size) as avg_size
-        FROM properties
-    ''').fetchone()
-    
-    # By risk level
-    risk_distribution = conn.execute('''
-        SELECT risk_level, COUNT(*) as count, AVG(price) as avg_price
-        FROM properties
-        GROUP BY risk_level
-    ''').fetchall()
-    
-    # By property type
-    type_distribution = conn.execute('''
-        SELECT property_type, COUNT(*) as count, AVG(price) as avg_price
-        FROM properties
-        GROUP BY property_type
-    ''').fetchall()
-    
-    # By location
-    location_distribution = conn.execute('''
-        SELECT location, COUNT(*) as count, AVG(price) as avg_price
-        FROM properties
-        GROUP BY location
-    ''').fetchall()
-    
-    conn.close()
-    
-    return jsonify({
-        'overall': dict(stats),
-        'by_risk': [dict(row) for row in risk_distribution],
-        'by_type': [dict(row) for row in type_distribution],
-        'by_location': [dict(row) for row in location_distribution]
-    })
+    return versioned_json_response(compute_analytics)
 
-if __name__ == '__main__':
+def create_app():
+    """Prepare the database and return the app; see wsgi.py for serving"""
     init_db()
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    return app
+
+if __name__ == '__main__':
+    # Development server only; serve with gunicorn in production
+    create_app().run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,11 @@
+"""
+WSGI entry point for production serving, e.g.
+
+    gunicorn -w $(nproc) -k gthread --threads 4 -b 0.0.0.0:5000 --preload wsgi:app
+
+--preload runs init_db() once in the master; each worker opens its own
+connection pool after the fork.
+"""
+from app import create_app
+
+app = create_app()